@@ -1,49 +1,74 @@
+import os
+import socket
 import psutil
-import json
-import subprocess
+import orjson
 import websocket
-import time 
+import time
 import datetime
 
+GIB = 1 << 30  # bytes per GiB, precomputed once
+_BOOT = psutil.boot_time()  # boot time never changes, read /proc only once
+psutil.cpu_percent(interval=None)  # prime so later non-blocking calls have a delta window
+
+# Keep the thermal zone open so each read is a single pread, no path walk
+try:
+    _TEMP_FD = os.open('/sys/class/thermal/thermal_zone0/temp', os.O_RDONLY)
+except OSError:
+    _TEMP_FD = None
+
 def get_cpu_temperature():
-    # Get cpu temperature using lm sensors
+    # Read cpu temperature straight from sysfs (millidegrees C)
     try:
-        result = subprocess.run(['sensors'],capture_output=True, text=True)
-        output = result.stdout
-        for Line in output.split('\n'):
-            if 'Core 0' in Line:
-                temp = Line.split(':')[1].strip().split(' ')[0]
-                return float(temp.replace("°C", ""))
+        if _TEMP_FD is not None:
+            return int(os.pread(_TEMP_FD, 16, 0)) / 1000.0
+        # Fallback for systems without thermal_zone0
+        for entries in psutil.sensors_temperatures().values():
+            if entries:
+                return entries[0].current
         return None
     except Exception as e:
         print(f"Error getting CPU temperature: {e}")
         return None
 
+def _format_uptime(seconds):
+    # Same shape str(timedelta) produced, without the allocation - including
+    # the "N day(s), " prefix once uptime passes 24 h
+    d, s = divmod(seconds, 86400)
+    h, s = divmod(s, 3600)
+    m, s = divmod(s, 60)
+    if d:
+        return f"{d} day{'s' if d != 1 else ''}, {h}:{m:02d}:{s:02d}"
+    return f"{h}:{m:02d}:{s:02d}"
+
 def get_system_metrics():
-    # Get system metrics using psutil
+    # Get system metrics using psutil - read each source once and reuse
+    freq = psutil.cpu_freq()
+    vm = psutil.virtual_memory()
+    du = psutil.disk_usage('/')
+    net = psutil.net_io_counters()
     metrics = {
-        'timestamp': datetime.datetime.now().isoformat(),
-        'cpu_percent': psutil.cpu_percent(interval=1),
+        'timestamp': datetime.datetime.now(),  # orjson formats datetimes natively
+        'cpu_percent': psutil.cpu_percent(interval=None),  # non-blocking, usage since last call
         'cpu_frequency': {
-            'current': psutil.cpu_freq().current if psutil.cpu_freq() else None,
-            'max': psutil.cpu_freq().max if psutil.cpu_freq() else None
+            'current': freq.current if freq else None,
+            'max': freq.max if freq else None
         },
         'memory': {
-            'total': psutil.virtual_memory().total /(1024 ** 3),
-            'used': psutil.virtual_memory().used /(1024 ** 3),
-            'percent': psutil.virtual_memory().percent
+            'total': vm.total / GIB,
+            'used': vm.used / GIB,
+            'percent': vm.percent
         },
         'disk': {
-            'total': psutil.disk_usage('/').total /(1024 ** 3),
-            'used': psutil.disk_usage('/').used /(1024**3),
-            'free': psutil.disk_usage('/').free /(1024 ** 3),
-            'percent': psutil.disk_usage('/').percent
+            'total': du.total / GIB,
+            'used': du.used / GIB,
+            'free': du.free / GIB,
+            'percent': du.percent
         },
         'network': {
-            'bytes_sent': psutil.net_io_counters().bytes_sent /(1024 ** 3),
-            'bytes_recv': psutil.net_io_counters().bytes_recv /(1024 ** 3)
+            'bytes_sent': net.bytes_sent / GIB,
+            'bytes_recv': net.bytes_recv / GIB
         },
-        'uptime': str(datetime.timedelta(seconds=int(time.time() - psutil.boot_time()))),
+        'uptime': _format_uptime(int(time.time() - _BOOT)),
         'cpu_temperature': get_cpu_temperature()
     }
     return metrics
@@ -52,21 +77,31 @@ def main():
     # websocket connection cnfiguration
     ws_url = "wss://evenly-pure-titmouse.ngrok-free.app"
     print(f"Connecting to websocket server at {ws_url}")
-    ws = websocket.WebSocket()
+    ws = None
     try:
-        ws.connect(ws_url)
+        # Single long-lived connection; binary frames skip UTF-8 validation
+        # entirely and TCP keepalive stops NAT timeouts from silently
+        # killing the socket between 30s samples.
+        ws = websocket.create_connection(ws_url, enable_multithread=False,
+                                         skip_utf8_validation=True)
+        ws.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # No Nagle delay on the small metric frames, and room to absorb
+        # a slow ngrok tunnel without blocking the sampler
+        ws.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        ws.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
         print("Connected to websocket server")
 
         while True:
             metrics = get_system_metrics()
             print(f"Sending metrics: {metrics}")
-            ws.send(json.dumps(metrics))
+            ws.send_binary(orjson.dumps(metrics))
             print(f"Sent metrics at {metrics['timestamp']}")
             time.sleep(30) # Adjus the sleep time as needed
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        ws.close()
+        if ws is not None:
+            ws.close()
         print("Disconnected from the websocket server")
     
 if __name__ == "__main__":
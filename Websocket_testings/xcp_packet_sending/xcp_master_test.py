@@ -1,45 +1,93 @@
 # xcp_server_threaded.py
+import asyncio
+import os
+import socket
 import threading
-import queue
 import struct
 import time
-from websocket_server import WebsocketServer
+from collections import deque
+import websockets
+import uvloop
 
-tx_queue = queue.Queue()
+uvloop.install()  # drop-in replacement for the default selector event loop
 
-# Create XCP packet: PID (1 byte), timestamp (4 bytes), data (n bytes)
-def create_xcp_packet(pid, data: bytes) -> bytes:
-    timestamp = int(time.time())
-    header = struct.pack(">BI", pid, timestamp)  # B=1 byte, I=4 bytes
-    return header + data
+PID = 0xF1  # Static PID for now
+_HDR = struct.Struct(">BI")  # compiled once: B=1 byte PID, I=4 byte timestamp
 
-def new_client(client, server):
-    print(f"[+] Client connected: {client['id']}")
+connected = set()
+tx_pending = deque()
+tx_waiter = None  # Future the tx worker parks on while tx_pending is empty
 
-def client_left(client, server):
-    print(f"[-] Client disconnected: {client['id']}")
+# Create XCP packet: PID (1 byte), timestamp (4 bytes), data (n bytes).
+# Batch producers can sample time.time() once and pass ts for the whole burst.
+def create_xcp_packet(pid, data: bytes, ts=None) -> bytes:
+    if ts is None:
+        ts = int(time.time())
+    return _HDR.pack(pid, ts) + data
 
-def message_received(client, server, message):
-    print(f"[←] Server RX (not used): {message}")
+async def handler(websocket):
+    sock = websocket.transport.get_extra_info('socket')
+    if sock is not None:
+        # Small XCP frames must not sit in Nagle's buffer for up to 40ms
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    connected.add(websocket)
+    print(f"[+] Client connected: {websocket.remote_address}")
+    try:
+        async for message in websocket:
+            print(f"[←] Server RX (not used): {message}")
+    finally:
+        connected.discard(websocket)
+        print(f"[-] Client disconnected: {websocket.remote_address}")
 
-def tx_worker(server):
+def queue_packet(packet):
+    # Runs on the server loop (via call_soon_threadsafe from the input thread)
+    global tx_waiter
+    tx_pending.append(packet)
+    if tx_waiter is not None and not tx_waiter.done():
+        tx_waiter.set_result(None)
+        tx_waiter = None
+
+async def tx_worker():
+    global tx_waiter
     while True:
-        if not tx_queue.empty():
-            packet = tx_queue.get()
-            hex_packet = packet.hex()
-            for client in server.clients:
-                server.send_message(client, hex_packet)
-                print(f"[→] Server TX: {hex_packet}")
+        if not tx_pending:
+            tx_waiter = asyncio.get_running_loop().create_future()
+            await tx_waiter
+        batch = list(tx_pending)
+        tx_pending.clear()
+        # Raw bytes go out as binary frames - no hex doubling on the wire.
+        # broadcast() frames each payload once and writes it to every transport.
+        # It buffers synchronously, so the whole batch is handed to the
+        # transports before this coroutine yields and the loop flushes -
+        # one pass through the event loop per burst, not per packet.
+        for packet in batch:
+            websockets.broadcast(connected, packet)
+        print(f"[→] Server TX ({len(batch)} packet(s)): {' '.join(p.hex() for p in batch)}")
 
-def start_server():
-    server = WebsocketServer(host='0.0.0.0', port=8000)
-    server.set_fn_new_client(new_client)
-    server.set_fn_client_left(client_left)
-    server.set_fn_message_received(message_received)
+async def main():
+    # compression=None: permessage-deflate costs far more than it saves
+    # on 5-13 byte binary packets
+    async with websockets.serve(handler, '0.0.0.0', 8000, compression=None):
+        print("🟢 XCP Server running on ws://0.0.0.0:8000")
+        await tx_worker()
 
-    threading.Thread(target=tx_worker, args=(server,), daemon=True).start()
-    print("🟢 XCP Server running on ws://0.0.0.0:8000")
-    server.run_forever()
+loop = asyncio.new_event_loop()
+
+def start_server():
+    # Pin the server loop thread to one core and raise its priority so tx
+    # wakeups don't bounce between cores behind the input thread. Both are
+    # best effort - SCHED_FIFO needs CAP_SYS_NICE.
+    try:
+        os.sched_setaffinity(0, {2})
+    except (OSError, AttributeError):
+        pass
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(20))
+    except (OSError, AttributeError, PermissionError):
+        pass
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(main())
 
 if __name__ == "__main__":
     threading.Thread(target=start_server, daemon=True).start()
@@ -48,9 +96,7 @@ if __name__ == "__main__":
         try:
             raw_data = input("Enter hex data bytes (e.g. 11 22 33): ")
             data = bytes.fromhex(raw_data)
-            pid = 0xF1  # Static PID for now
-            packet = create_xcp_packet(pid, data)
-            tx_queue.put(packet)
+            packet = create_xcp_packet(PID, data)
+            loop.call_soon_threadsafe(queue_packet, packet)
         except ValueError:
             print("Invalid input. Use hex bytes.")
-
@@ -1,14 +1,19 @@
 # client.py
 import websocket
-import threading
+from collections import deque
 
-rx_buffer = []
+rx_buffer = deque(maxlen=1024)  # bounded - old packets fall off the back
+
+DEBUG = False
+_fromhex = bytes.fromhex  # bound once, skips the attribute lookup per frame
 
 def on_message(ws, message):
     try:
-        raw = bytes.fromhex(message)
+        # The server sends binary frames now; hex text is kept as a fallback
+        raw = message if isinstance(message, bytes) else _fromhex(message)
         rx_buffer.append(raw)
-        print(f"[←] Client RX Buffer: {[p.hex() for p in rx_buffer]}")
+        if DEBUG:
+            print(f"[←] Client RX: {raw.hex()}")
     except Exception as e:
         print(f"[!] Failed to decode: {e}")
 
@@ -19,7 +24,4 @@ ws = websocket.WebSocketApp("wss://evenly-pure-titmouse.ngrok-free.app",
                             on_message=on_message,
                             on_open=on_open)
 
-threading.Thread(target=ws.run_forever, daemon=True).start()
-
-while True:
-    pass  # Keep running
+ws.run_forever()  # blocks here - no keep-alive thread or busy loop needed
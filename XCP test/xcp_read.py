@@ -1,24 +1,65 @@
 import spidev
+import struct
 import time
+import logging
+
+log = logging.getLogger(__name__)
 
 spi = spidev.SpiDev()
 spi.open(0, 0)
 spi.max_speed_hz = 500000  # Set to 500 kHz
 spi.mode = 0b00  # SPI Mode 0 (CPOL=0, CPHA=0)
 
+DUMMY = [0xAA] * 8  # preallocated once, xfer2 never mutates its argument
+
+# Fixed commands built once at import - no per-call list concat + marshal
+XCP_DISCONNECT = bytes.fromhex("fe00000000000000")
+XCP_CONNECT = bytes.fromhex("ff00000000000000")
+XCP_UPLOAD4 = bytes.fromhex("f504000000000000")
+
+_tx = bytearray(8)  # shared frame buffer, packed in place per command
+
+def set_mta_cmd(addr):
+    # SET_MTA: opcode, 2 reserved bytes, address extension, 32-bit address.
+    # pack_into reuses the shared buffer - zero allocation per command.
+    # Callers must send (or copy) the frame before building the next one.
+    struct.pack_into("<BBBBI", _tx, 0, 0xF6, 0, 0, 0, addr)
+    return _tx
+
 def send_command(cmd):
     if len(cmd) != 8:
         raise ValueError("Command must be 8 bytes")
 
-    print(f">> Sending: {cmd}")
-    spi.xfer2(cmd)
-
+    # At DEBUG and below nothing is formatted - the level guard makes the
+    # log call free on the hot path, and bytes().hex() is one C call
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("TX %s", bytes(cmd).hex())
+    # SPI is full duplex: the dummy transfer clocks the slave's response in
+    # while it clocks 0xAA out, so a single read after the turnaround gap
+    # is enough - the second back-to-back dummy read was a wasted ioctl
+    spi.xfer2(list(cmd))
     time.sleep(0.01)
-    spi.xfer2([0xAA] * 8)  # Dummy read
-    response = spi.xfer2([0xAA] * 8)
-    print(f"<< Received: {response}")
+    response = spi.xfer2(DUMMY)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("RX %s", bytes(response).hex())
     return response
 
+def spi_transact_batch(cmds, inter_delay_us=100):
+    """Send several 8-byte commands back to back and return their responses.
+
+    The turnaround gap is inserted by the kernel via delay_usecs instead of
+    a 10 ms Python sleep per command. py-spidev cannot queue multiple
+    segments into one SPI_IOC_MESSAGE ioctl, so this is as close to a
+    single-ioctl batch as the binding allows.
+    """
+    responses = []
+    for cmd in cmds:
+        if len(cmd) != 8:
+            raise ValueError("Command must be 8 bytes")
+        spi.xfer2(list(cmd), 0, inter_delay_us)
+        responses.append(spi.xfer2(DUMMY))
+    return responses
+
 def interactive_sequence():
     """Prompt user to select and send XCP commands one by one."""
     try:
@@ -34,48 +75,49 @@ def interactive_sequence():
 
             if choice == "1":
                 print("Sending XCP DISCONNECT...")
-                send_command([0xFE] + [0x00]*7)
+                send_command(XCP_DISCONNECT)
 
             elif choice == "2":
                 print("Sending XCP CONNECT...")
-                send_command([0xFF] + [0x00]*7)
+                send_command(XCP_CONNECT)
 
             elif choice == "3":
                 print("Sending SET_MTA to 0x20000028...")
-                set_mta_cmd = [0xF6, 0x00, 0x00, 0x00, 0x28, 0x00, 0x00, 0x20]
-                send_command(set_mta_cmd)
+                send_command(set_mta_cmd(0x20000028))
 
             elif choice == "4":
                 print("Sending UPLOAD for 4 bytes...")
-                upload_cmd = [0xF5, 0x04] + [0x00]*6
-                response = send_command(upload_cmd)
+                response = send_command(XCP_UPLOAD4)
                 if response:
                     print(f"<< Upload Response: {response}")
                     print("Data:", response[1:5])
 
             elif choice == "5":
-                print("Sending SET_MTA to 0x20000028...")
-                set_mta = [0xF6, 0x00, 0x00, 0x00, 0x28, 0x00, 0x00, 0x20]
-                response = send_command(set_mta)
-                if response[0] != 0xFF:
-                    raise RuntimeError("Failed to SET MTA")
-
-                print("Enter 4 bytes to write (0-255), separated by space:")
+                print("Enter 4 bytes to write (8 hex digits, or 0-255 separated by space):")
                 try:
-                    user_input = input(">> ").strip().split()
-                    if len(user_input) != 4:
-                        raise ValueError("Please enter exactly 4 bytes.")
-
-                    data_bytes = [int(b) & 0xFF for b in user_input]
+                    line = input(">> ").strip()
+                    # Fast path: one C-level scan instead of four int() parses.
+                    # Only a bare 8-digit string qualifies - space-separated
+                    # values like "12 34 56 78" are decimal by convention and
+                    # must not be reinterpreted as hex.
+                    if " " not in line and len(line) == 8 and all(c in "0123456789abcdefABCDEF" for c in line):
+                        data_bytes = list(bytes.fromhex(line))
+                    else:
+                        user_input = line.split()
+                        if len(user_input) != 4:
+                            raise ValueError("Please enter exactly 4 bytes.")
+
+                        data_bytes = [int(b) & 0xFF for b in user_input]
                 except ValueError as ve:
                     print(f"Input error: {ve}")
                     continue
 
-                # DOWNLOAD 4 bytes
                 download_cmd = [0xF0, 0x04] + data_bytes + [0x00] * (8 - 2 - len(data_bytes))
-                print(f"Sending DOWNLOAD with data: {data_bytes}")
-                response = send_command(download_cmd)
-                if response[0] != 0xFF:
+                print(f"Sending SET_MTA + DOWNLOAD batch with data: {data_bytes}")
+                responses = spi_transact_batch([set_mta_cmd(0x20000028), download_cmd])
+                if responses[0][0] != 0xFF:
+                    raise RuntimeError("Failed to SET MTA")
+                if responses[1][0] != 0xFF:
                     raise RuntimeError("DOWNLOAD failed!")
 
             elif choice == "6":
@@ -93,4 +135,5 @@ def interactive_sequence():
         spi.close()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)  # set DEBUG to trace SPI frames
     interactive_sequence()
@@ -14,8 +14,9 @@ The WebSocket server provides remote access to parameter functionality.
 
 import sys
 import time
+import mmap
 import numpy as np
-import json
+import orjson
 import os
 from PyQt5 import QtCore
 from PyQt5.QtGui import QIntValidator
@@ -25,11 +26,20 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QTableWidget, QTableWidgetItem, QSpinBox, 
                              QDoubleSpinBox, QCheckBox, QSplitter, QFileDialog,
                              QMessageBox, QTextEdit)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, pyqtSlot, QThread
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal, pyqtSlot, QThread, QSignalBlocker
 import pyqtgraph as pg
 import threading
+import queue
+
+# Rasterize plot lines on the GPU; antialiasing off keeps the upload cheap
+pg.setConfigOptions(useOpenGL=True, enableExperimental=True, antialias=False)
 from websocket_server_test import WebSocketServer
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional - the numpy fallback below is used
+    njit = None
+
 PARAMETER_DEFS = [
     {"name": "INPUT_VOLTAGE", "address": 0x20000000, "size": 4, "type": "float", "min": 0, "max": 1000, "description": "Input AC voltage (V)"},
     {"name": "INPUT_CURRENT", "address": 0x20000004, "size": 4, "type": "float", "min": 0, "max": 100, "description": "Input AC current (A)"},
@@ -43,6 +53,79 @@ PARAMETER_DEFS = [
     {"name": "REMAINING_TIME", "address": 0x20000024, "size": 4, "type": "float", "min": 0, "max": 1440, "description": "Estimated remaining charge time (minutes)"}
 ]
 
+PARAM_NAMES = [p["name"] for p in PARAMETER_DEFS]
+NAME_TO_IDX = {p["name"]: i for i, p in enumerate(PARAMETER_DEFS)}
+UNITS = {
+    "INPUT_VOLTAGE": "V", "INPUT_CURRENT": "A",
+    "OUTPUT_VOLTAGE": "V", "OUTPUT_CURRENT": "A",
+    "TEMPERATURE": "°C", "CHARGE_RATE": "kW",
+    "EFFICIENCY": "%", "STATE_OF_CHARGE": "%",
+    "CHARGE_TIME": "min", "REMAINING_TIME": "min",
+}
+PARAM_MINS = np.array([p["min"] for p in PARAMETER_DEFS], dtype=np.float32)
+PARAM_MAXS = np.array([p["max"] for p in PARAMETER_DEFS], dtype=np.float32)
+PARAM_SPANS = PARAM_MAXS - PARAM_MINS
+PARAM_IS_INT = np.array([p["type"] != "float" for p in PARAMETER_DEFS])
+_RNG = np.random.default_rng()  # shared generator for one-shot reads
+
+if njit is not None:
+    @njit(cache=True, boundscheck=False)
+    def _clamp(vals, mins, maxs):
+        out = np.empty_like(vals)
+        for i in range(vals.shape[0]):
+            v = vals[i]
+            if v < mins[i]:
+                v = mins[i]
+            elif v > maxs[i]:
+                v = maxs[i]
+            out[i] = v
+        return out
+else:
+    def _clamp(vals, mins, maxs):
+        return np.minimum(np.maximum(vals, mins), maxs)
+
+def decode_frame(buf):
+    """Raw little-endian float32 frame (PARAMETER_DEFS order) -> clamped vector"""
+    vals = np.frombuffer(buf, dtype='<f4')
+    return _clamp(vals, PARAM_MINS, PARAM_MAXS)
+
+# Button stylesheets defined once - re-setting an identical sheet still makes
+# Qt re-parse the CSS and re-polish the widget
+START_CSS = """
+    QPushButton {
+        background-color: #4CAF50;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        font-size: 14px;
+        font-weight: bold;
+        border-radius: 4px;
+    }
+    QPushButton:hover {
+        background-color: #45a049;
+    }
+    QPushButton:pressed {
+        background-color: #3e8e41;
+    }
+"""
+STOP_CSS = """
+    QPushButton {
+        background-color: #f44336;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        font-size: 14px;
+        font-weight: bold;
+        border-radius: 4px;
+    }
+    QPushButton:hover {
+        background-color: #da190b;
+    }
+    QPushButton:pressed {
+        background-color: #b71c1c;
+    }
+"""
+
 class ParameterMonitorThread(QThread):
     """Thread for monitoring parameter values"""
     
@@ -53,26 +136,35 @@ class ParameterMonitorThread(QThread):
         self.parameter_defs = parameter_defs
         self.update_interval = update_interval
         self.running = False
-        
+        # Draw the whole parameter vector in one RNG call per tick instead
+        # of one Python-level call per parameter
+        self._names = [p["name"] for p in parameter_defs]
+        self._mins = np.array([p["min"] for p in parameter_defs], dtype=np.float64)
+        self._maxs = np.array([p["max"] for p in parameter_defs], dtype=np.float64)
+        self._span = self._maxs - self._mins
+        self._buf = np.empty(len(parameter_defs))  # reused every tick
+        self._rng = np.random.default_rng()  # PCG64, no legacy global lock
+
     def run(self):
         self.running = True
+        period = self.update_interval / 1000.0
+        next_tick = time.monotonic()
         while self.running:
-            values = {}
-            for param in self.parameter_defs:
-                if param["type"] == "float":
-                    value = np.random.uniform(param["min"], param["max"])
-                elif param["type"] == "uint16":
-                    value = np.random.randint(param["min"], param["max"])
-                else:  # uint8
-                    value = np.random.randint(param["min"], param["max"])
-                
-                values[param["name"]] = value
-                
-            if values:
-                self.new_values.emit(values)
-                
-            time.sleep(self.update_interval / 1000.0)
-            
+            # uniform() has no out= parameter, so draw into the preallocated
+            # buffer with random() and scale in place - zero allocation per tick
+            self._rng.random(out=self._buf)
+            np.multiply(self._buf, self._span, out=self._buf)
+            np.add(self._buf, self._mins, out=self._buf)
+            self.new_values.emit(dict(zip(self._names, self._buf.tolist())))
+
+            # Drift-corrected sleep keeps the cadence stable under GIL pressure
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()  # fell behind, resync
+
     def stop(self):
         self.running = False
 
@@ -85,26 +177,62 @@ class MainWindow(QMainWindow):
         
         self.ws_server = WebSocketServer(port=8000)
         self.ws_server.register_value_callback(self.handle_value_update)
+        self.value_queue = queue.Queue()
         self.ws_server.register_connection_callback(self.handle_connection_change)
         self.server_running = False
         self.client_connected = False
         
         self.history_length = 200
-        self.parameter_history = {}
-        self.time_values = np.zeros(self.history_length)
-        
-        for param in PARAMETER_DEFS:
-            self.parameter_history[param["name"]] = np.zeros(self.history_length)
-            
+
+        # SoA ring buffer: one row per parameter, a write is one scalar store
+        # instead of shifting a 200-element array per parameter per frame
+        self.history = np.zeros((len(PARAMETER_DEFS), self.history_length),
+                                dtype=np.float32)
+        self.hist_idx = 0
+
+
         self.init_ui()
         
         self.plot_timer = QTimer()
         self.plot_timer.timeout.connect(self.update_plots)
-        self.plot_timer.start(100)
-    
+        self.plot_timer.start(200)  # 5 Hz redraw is plenty for the eye
+
+        # With a fixed redraw cadence the relative time axis never changes -
+        # compute it once instead of shifting/subtracting arrays per frame
+        self.x_rel = (np.arange(-(self.history_length - 1), 1)
+                      * (self.plot_timer.interval() / 1000.0)).astype(np.float32)
+
+        # Coalesce WebSocket value updates: the server thread only enqueues,
+        # and this timer merges everything pending into one display refresh
+        self.value_timer = QTimer()
+        self.value_timer.timeout.connect(self.flush_value_updates)
+        self.value_timer.start(50)
+
+        # Log lines are buffered and appended in one batch - QTextEdit.append
+        # relayouts and repaints the widget on every call
+        self._log_buf = []
+        self.log_timer = QTimer()
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start(250)
+
     def handle_value_update(self, values):
-        if self.client_connected:
-            self.update_parameter_displays(values)
+        # Called from the WebSocket thread - no Qt work allowed here
+        if isinstance(values, (bytes, bytearray)):
+            # Raw float32 frame from the binary wire format
+            values = dict(zip(PARAM_NAMES, decode_frame(values).tolist()))
+        else:
+            values = dict(values)
+        self.value_queue.put(values)
+
+    def flush_value_updates(self):
+        merged = {}
+        try:
+            while True:
+                merged.update(self.value_queue.get_nowait())  # latest value wins
+        except queue.Empty:
+            pass
+        if merged and self.client_connected:
+            self.update_parameter_displays(merged)
 
     def handle_connection_change(self, connected):
         self.client_connected = connected
@@ -132,23 +260,8 @@ class MainWindow(QMainWindow):
         
         self.start_server_button = QPushButton("Start Server")
         self.start_server_button.clicked.connect(self.toggle_server)
-        self.start_server_button.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                font-size: 14px;
-                font-weight: bold;
-                border-radius: 4px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-            QPushButton:pressed {
-                background-color: #3e8e41;
-            }
-        """)
+        self.start_server_button.setStyleSheet(START_CSS)
+        self._last_css = START_CSS
         buttons_layout.addWidget(self.start_server_button)
         
         self.server_status_label = QLabel("Server Status: Stopped")
@@ -193,20 +306,7 @@ class MainWindow(QMainWindow):
             value_item.setFlags(QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled)
             self.param_table.setItem(i, 3, value_item)
             
-            unit = ""
-            if "VOLTAGE" in param["name"]:
-                unit = "V"
-            elif "CURRENT" in param["name"]:
-                unit = "A"
-            elif "TEMPERATURE" in param["name"]:
-                unit = "°C"
-            elif "EFFICIENCY" in param["name"] or "STATE_OF_CHARGE" in param["name"]:
-                unit = "%"
-            elif "CHARGE_RATE" in param["name"]:
-                unit = "kW"
-            elif "TIME" in param["name"]:
-                unit = "min"
-            self.param_table.setItem(i, 4, QTableWidgetItem(unit))
+            self.param_table.setItem(i, 4, QTableWidgetItem(UNITS.get(param["name"], "")))
             
             if param["type"] == "float":
                 control = QDoubleSpinBox()
@@ -221,6 +321,10 @@ class MainWindow(QMainWindow):
             self.param_table.setCellWidget(i, 5, control)
             self.param_controls[param["name"]] = control
             
+        # Cache the value items so updates skip the model-index lookup per cell
+        self.value_items = [self.param_table.item(i, 3) for i in range(len(PARAMETER_DEFS))]
+        self.last_value_str = [""] * len(PARAMETER_DEFS)
+
         params_layout.addWidget(self.param_table)
         
         param_buttons_layout = QHBoxLayout()
@@ -258,6 +362,8 @@ class MainWindow(QMainWindow):
         charger_plot.setLabel('left', 'Value')
         charger_plot.setLabel('bottom', 'Time (s)')
         charger_plot.showGrid(x=True, y=True)
+        charger_plot.setClipToView(True)
+        charger_plot.setDownsampling(mode='peak', auto=True)
         charger_plot.addLegend()
         charger_layout.addWidget(charger_plot)
         
@@ -275,6 +381,8 @@ class MainWindow(QMainWindow):
         battery_plot.setLabel('left', 'Value')
         battery_plot.setLabel('bottom', 'Time (s)')
         battery_plot.showGrid(x=True, y=True)
+        battery_plot.setClipToView(True)
+        battery_plot.setDownsampling(mode='peak', auto=True)
         battery_plot.addLegend()
         battery_layout.addWidget(battery_plot)
         
@@ -292,6 +400,8 @@ class MainWindow(QMainWindow):
         system_plot.setLabel('left', 'Value')
         system_plot.setLabel('bottom', 'Time (s)')
         system_plot.showGrid(x=True, y=True)
+        system_plot.setClipToView(True)
+        system_plot.setDownsampling(mode='peak', auto=True)
         system_plot.addLegend()
         system_layout.addWidget(system_plot)
         
@@ -399,28 +509,24 @@ class MainWindow(QMainWindow):
         
     def log_message(self, message):
         timestamp = time.strftime("%H:%M:%S")
-        self.log_text.append(f"[{timestamp}] {message}")
-        
+        self._log_buf.append(f"[{timestamp}] {message}")
+        if len(self._log_buf) > 500:  # bound memory under burst traffic
+            del self._log_buf[:-500]
+
+    def flush_log(self):
+        if self._log_buf:
+            self.log_text.append("\n".join(self._log_buf))
+            self._log_buf.clear()
+        
+    def _set_button_css(self, css):
+        if self._last_css is not css:  # skip the re-parse when unchanged
+            self.start_server_button.setStyleSheet(css)
+            self._last_css = css
+
     def update_ui_state(self, server_running):
         if server_running:
             self.start_server_button.setText("Stop Server")
-            self.start_server_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #f44336;
-                    color: white;
-                    border: none;
-                    padding: 8px 16px;
-                    font-size: 14px;
-                    font-weight: bold;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #da190b;
-                }
-                QPushButton:pressed {
-                    background-color: #b71c1c;
-                }
-            """)
+            self._set_button_css(STOP_CSS)
             self.server_status_label.setText("Server Status: Running")
             self.server_status_label.setStyleSheet("color: green; font-weight: bold;")
             self.read_all_button.setEnabled(True)
@@ -430,23 +536,7 @@ class MainWindow(QMainWindow):
             self.ws_port_input.setEnabled(False)
         else:
             self.start_server_button.setText("Start Server")
-            self.start_server_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #4CAF50;
-                    color: white;
-                    border: none;
-                    padding: 8px 16px;
-                    font-size: 14px;
-                    font-weight: bold;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #45a049;
-                }
-                QPushButton:pressed {
-                    background-color: #3e8e41;
-                }
-            """)
+            self._set_button_css(START_CSS)
             self.server_status_label.setText("Server Status: Stopped")
             self.server_status_label.setStyleSheet("color: red; font-weight: bold;")
             self.read_all_button.setEnabled(False)
@@ -511,39 +601,49 @@ class MainWindow(QMainWindow):
             self.log_message("Parameter monitoring stopped")
             
     def update_parameter_displays(self, values):
-        for i, param in enumerate(PARAMETER_DEFS):
-            name = param["name"]
-            if name in values:
-                value = values[name]
-                
-                if param["type"] == "float":
-                    display_value = f"{value:.3f}"
-                else:
-                    display_value = str(value)
-                
-                self.param_table.item(i, 3).setText(display_value)
-                
-                self.parameter_history[name][:-1] = self.parameter_history[name][1:]
-                self.parameter_history[name][-1] = value
-                
+        col = self.hist_idx
+        # Carry the previous column forward so params missing from this
+        # update keep their last value in the ring
+        self.history[:, col] = self.history[:, col - 1]
+        # Iterate the update itself (often smaller than PARAMETER_DEFS) and
+        # map names to rows through the precomputed index
+        for name, value in values.items():
+            i = NAME_TO_IDX.get(name)
+            if i is None:
+                continue
+
+            if PARAMETER_DEFS[i]["type"] == "float":
+                display_value = f"{value:.3f}"
+            else:
+                display_value = str(value)
+
+            # setText only when the shown text actually changes - every
+            # call requests a repaint even for identical strings
+            if display_value != self.last_value_str[i]:
+                self.value_items[i].setText(display_value)
+                self.last_value_str[i] = display_value
+
+            self.history[i, col] = value
+        self.hist_idx = (col + 1) % self.history_length
+
+    def history_ordered(self):
+        """Oldest-to-newest view of the ring buffer (one concatenate per call)"""
+        idx = self.hist_idx
+        if idx == 0:
+            return self.history
+        return np.concatenate((self.history[:, idx:], self.history[:, :idx]), axis=1)
+
     def update_plots(self):
-        current_time = time.time()
-        if self.time_values[0] == 0:
-            self.time_values[:] = current_time
-        else:
-            self.time_values[:-1] = self.time_values[1:]
-            self.time_values[-1] = current_time
-        
-        relative_time = self.time_values - self.time_values[0]
-        
+        # One shared precomputed float32 x-axis for all curves; contiguous
+        # float32 y rows let pyqtgraph skip its dtype conversion pass
+        ordered = self.history_ordered()
         for name, curve in self.plot_curves.items():
-            curve.setData(relative_time, self.parameter_history[name])
-            
+            curve.setData(self.x_rel, ordered[NAME_TO_IDX[name]],
+                          skipFiniteCheck=True, connect='all')
+
     def clear_plots(self):
-        for name in self.parameter_history:
-            self.parameter_history[name][:] = 0
-            
-        self.time_values[:] = 0
+        self.history[:] = 0
+        self.hist_idx = 0
         self.update_plots()
         self.log_message("Plot data cleared")
         
@@ -555,17 +655,13 @@ class MainWindow(QMainWindow):
             return
             
         try:
-            with open(file_path, 'w') as f:
-                f.write("Time")
-                for param in PARAMETER_DEFS:
-                    f.write(f",{param['name']}")
-                f.write("\n")
-                
-                for i in range(self.history_length):
-                    f.write(f"{self.time_values[i]}")
-                    for param in PARAMETER_DEFS:
-                        f.write(f",{self.parameter_history[param['name']][i]}")
-                    f.write("\n")
+            # One C-level savetxt call instead of ~2200 formatted f.write()s.
+            # Absolute sample times are derived from now + the fixed offsets.
+            ordered = self.history_ordered()
+            np.savetxt(file_path,
+                       np.column_stack([time.time() + self.x_rel, ordered.T]),
+                       delimiter=",", fmt="%.6g", comments="",
+                       header="Time," + ",".join(PARAM_NAMES))
                     
             self.log_message(f"Plot data saved to {file_path}")
             self.statusBar().showMessage(f"Plot data saved to {file_path}")
@@ -577,22 +673,24 @@ class MainWindow(QMainWindow):
         if not self.server_running:
             return
             
-        values = {}
-        for param in PARAMETER_DEFS:
-            if param["type"] == "float":
-                value = np.random.uniform(param["min"], param["max"])
-            elif param["type"] == "uint16":
-                value = np.random.randint(param["min"], param["max"])
-            else:  # uint8
-                value = np.random.randint(param["min"], param["max"])
-                
-            values[param["name"]] = value
-                
-            if param["name"] in self.param_controls:
-                control = self.param_controls[param["name"]]
-                control.blockSignals(True)
-                control.setValue(value)
-                control.blockSignals(False)
+        # One vectorized draw for every parameter instead of a Python-level
+        # np.random call per row; integer types truncate like randint did
+        vals = PARAM_MINS + _RNG.random(len(PARAM_NAMES), dtype=np.float32) * PARAM_SPANS
+        np.floor(vals, where=PARAM_IS_INT, out=vals)
+        values = dict(zip(PARAM_NAMES, vals.tolist()))
+
+        # One repaint for the whole table instead of one per control;
+        # QSignalBlocker restores the signal state even on an exception
+        self.param_table.setUpdatesEnabled(False)
+        try:
+            for name, value in values.items():
+                if name in self.param_controls:
+                    control = self.param_controls[name]
+                    with QSignalBlocker(control):
+                        control.setValue(value)
+        finally:
+            self.param_table.setUpdatesEnabled(True)
+            self.param_table.viewport().update()
                 
         self.update_parameter_displays(values)
         self.log_message("All parameters read successfully")
@@ -640,8 +738,8 @@ class MainWindow(QMainWindow):
                         "size": param["size"]
                     }
                     
-            with open(file_path, 'w') as f:
-                json.dump(config, f, indent=2)
+            with open(file_path, 'wb') as f:
+                f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
                 
             self.log_message(f"Configuration saved to {file_path}")
             self.statusBar().showMessage(f"Configuration saved to {file_path}")
@@ -657,17 +755,27 @@ class MainWindow(QMainWindow):
             return
             
         try:
-            with open(file_path, 'r') as f:
-                config = json.load(f)
+            # orjson parses any buffer, so the mmap'd page cache is handed
+            # to the parser directly - no intermediate str copy
+            with open(file_path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    config = orjson.loads(memoryview(mm))
+                finally:
+                    mm.close()
                 
             loaded_count = 0
-            for param_name, param_config in config.items():
-                if param_name in self.param_controls:
-                    control = self.param_controls[param_name]
-                    control.blockSignals(True)
-                    control.setValue(param_config["value"])
-                    control.blockSignals(False)
-                    loaded_count += 1
+            self.param_table.setUpdatesEnabled(False)
+            try:
+                for param_name, param_config in config.items():
+                    if param_name in self.param_controls:
+                        control = self.param_controls[param_name]
+                        with QSignalBlocker(control):
+                            control.setValue(param_config["value"])
+                        loaded_count += 1
+            finally:
+                self.param_table.setUpdatesEnabled(True)
+                self.param_table.viewport().update()
                     
             self.log_message(f"Configuration loaded from {file_path} ({loaded_count} parameters)")
             self.statusBar().showMessage(f"Configuration loaded: {loaded_count} parameters")
@@ -1,86 +1,226 @@
+import asyncio
+import random
 import socket
-import threading
-import json
+import struct
+import orjson
 import time
 import numpy as np
+import msgpack
+
+_LEN = struct.Struct("<I")  # 4-byte little-endian frame length prefix
+_R = random.Random()  # stdlib RNG - far cheaper than numpy for one scalar
 # from gui_test import PARAMETER_DEFS  # Import parameter definitions
 # from parameters import PARAMETER_DEFS  # Ensure parameter definitions are available
 
+def pack_array(obj):
+    """msgpack hook: serialize numpy arrays as raw dtype + buffer"""
+    if isinstance(obj, np.ndarray):
+        return {b'nd': True, b'type': obj.dtype.str,
+                b'shape': obj.shape, b'data': obj.tobytes()}
+    return obj
+
+def unpack_array(obj):
+    """msgpack hook: restore numpy arrays packed by pack_array"""
+    if b'nd' in obj:
+        return np.frombuffer(obj[b'data'],
+                             dtype=np.dtype(obj[b'type'])).reshape(obj[b'shape'])
+    return obj
+
 class WebSocketServer:
     def __init__(self, xcp_master=None, host='0.0.0.0', port=8000):
         self.xcp_master = xcp_master
         self.host = host
         self.port = port
-        self.server_socket = None
-        self.clients = []
+        self.clients = set()  # StreamWriters of connected clients
         self.running = False
         self.current_values = {}  # Store latest values
-        self.value_callbacks = []  # For GUI updates
-        self.connection_callbacks = []  # For connection status updates
+        # Callback registries are immutable tuples: registration swaps in
+        # a new tuple, so a fanout loop can never see a list mutated
+        # under it by the GUI thread
+        self.value_callbacks = ()  # For GUI updates
+        self.connection_callbacks = ()  # For connection status updates
+        self._loop = None
+        self._stop_event = None
+        self.recv_buffer_size = 65536  # big reads let pipelined commands coalesce
+        # address -> param lookup tables; built on first use because
+        # PARAMETER_DEFS is only imported at the bottom of this module
+        self._addr_to_param = None
+        self._addr_to_name = None
+        # Serialized-response memo: a GUI polling the same register sees
+        # identical replies apart from the timestamp, so the JSON body is
+        # cached up to the ts field and only the timestamp is appended
+        self._resp_cache = {}
+
+    def _build_addr_maps(self):
+        self._addr_to_param = {p["address"]: p for p in PARAMETER_DEFS}
+        self._addr_to_name = {p["address"]: p["name"] for p in PARAMETER_DEFS}
 
     def register_value_callback(self, callback):
         """Register a callback for value updates"""
-        self.value_callbacks.append(callback)
+        self.value_callbacks = self.value_callbacks + (callback,)
 
     def register_connection_callback(self, callback):
         """Register a callback for connection status changes"""
-        self.connection_callbacks.append(callback)
+        self.connection_callbacks = self.connection_callbacks + (callback,)
 
     def start(self):
-        """Start the JSON-over-TCP server"""
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.server_socket.bind((self.host, self.port))
-        self.server_socket.listen(5)
+        """Run the JSON-over-TCP server on its own asyncio event loop.
 
+        One thread multiplexes every client instead of a blocked OS thread
+        per connection; the GUI still calls start() from a daemon thread and
+        stop() from the Qt thread.
+        """
         self.running = True
-        print(f"🟢 Server listening on {self.host}:{self.port}")
-        threading.Thread(target=self._accept_clients, daemon=True).start()
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._loop.close()
+            self._loop = None
 
-    def _accept_clients(self):
-        while self.running:
-            try:
-                client, addr = self.server_socket.accept()
-                self.clients.append(client)
-                print(f"➕ Client connected: {addr}")
-                self._notify_connection_change(True)
-                threading.Thread(target=self._handle_client, args=(client,), daemon=True).start()
-            except Exception as e:
-                if self.running:
-                    print(f"Error accepting new client: {e}")
+    async def _serve(self):
+        self._stop_event = asyncio.Event()
+        server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        print(f"🟢 Server listening on {self.host}:{self.port}")
+        async with server:
+            await self._stop_event.wait()
+        # Unwind the per-client handler tasks before run_until_complete
+        # returns - closing the loop under them leaves "Task was
+        # destroyed but it is pending!" and their finally blocks hitting
+        # a dead loop
+        for writer in list(self.clients):
+            writer.close()
+        handlers = [t for t in asyncio.all_tasks()
+                    if t is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
 
-    def _handle_client(self, client):
-        addr = client.getpeername()
+    async def _handle_client(self, reader, writer):
+        addr = writer.get_extra_info('peername')
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            # Small command/response frames must not wait out Nagle, and
+            # bigger kernel buffers absorb read/write bursts
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        self.clients.add(writer)
+        print(f"➕ Client connected: {addr}")
+        self._notify_connection_change(True)
+        buf = bytearray()
+        framed_client = None  # wire mode, locked in by the first byte
         try:
             while self.running:
-                raw = client.recv(4096)
+                raw = await reader.read(self.recv_buffer_size)
                 if not raw:
                     break
 
-                msg = raw.decode('utf-8')
-                print(f"⬅️ {msg}")
-                resp = self._process_message(msg)
-                
-                # If response contains values, store and notify
-                if "value" in resp:
-                    param_name = self._address_to_param_name(resp.get("address"))
-                    if param_name:
-                        self.current_values[param_name] = resp["value"]
-                        self._notify_value_update(self.current_values)
-                
-                client.send(json.dumps(resp).encode('utf-8'))
+                buf += raw
+
+                if framed_client is None:
+                    # The first byte decides the wire mode for the whole
+                    # connection: '{' is legacy unframed JSON, anything
+                    # else the 4-byte little-endian length prefix. The
+                    # mode is sticky - re-sniffing every chunk would
+                    # misroute frames whose low length byte happens to
+                    # be 0x7B ('{')
+                    framed_client = buf[0] != 0x7B
+
+                msgs = []
+                if framed_client:
+                    while len(buf) >= 4:
+                        length = _LEN.unpack_from(buf)[0]
+                        if len(buf) - 4 < length:
+                            break  # wait for the rest of the frame
+                        msgs.append(bytes(buf[4:4 + length]))
+                        del buf[:4 + length]
+                else:
+                    # Legacy clients delimit with newlines or send one
+                    # message per segment
+                    if b'\n' in buf:
+                        *msgs, rest = buf.split(b'\n')
+                        buf = bytearray(rest)
+                    else:
+                        msgs = [bytes(buf)]
+                        buf.clear()
+
+                for msg in msgs:
+                    if not msg:
+                        continue
+                    self._handle_message(msg, writer, framed_client)
+                await writer.drain()
         except Exception as e:
             print(f"Error with client {addr}: {e}")
         finally:
-            client.close()
-            if client in self.clients:
-                self.clients.remove(client)
+            writer.close()
+            self.clients.discard(writer)
             print(f"➖ Client disconnected: {addr}")
             self._notify_connection_change(len(self.clients) > 0)
 
+    def _handle_message(self, raw, writer, framed=False):
+        # msgpack clients get msgpack back; JSON ('{' first byte) kept
+        # for old clients and the API-doc examples
+        use_msgpack = raw[:1] != b'{'
+        if use_msgpack:
+            try:
+                data = msgpack.unpackb(raw, object_hook=unpack_array, raw=False)
+                resp = self._process_command(data)
+            except Exception as e:
+                resp = {"error": f"Invalid msgpack: {e}"}
+        else:
+            # orjson parses bytes directly - no utf-8 decode round trip
+            resp = self._process_message(raw)
+
+        # If response contains values, store and notify
+        if "value" in resp:
+            param_name = self._address_to_param_name(resp.get("address"))
+            if param_name:
+                self.current_values[param_name] = resp["value"]
+                self._notify_value_update(self.current_values)
+
+        if use_msgpack:
+            payload = msgpack.packb(resp, default=pack_array)
+        else:
+            payload = self._serialize_json(resp)
+        if framed:
+            writer.write(_LEN.pack(len(payload)))  # echo the framing back
+        writer.write(payload)
+
+    def _serialize_json(self, resp):
+        """Serialize a response dict, memoizing repeated identical replies.
+
+        The ts field always comes last, so everything before it can be
+        cached per (command, address, value) and reused with just the
+        current timestamp appended.
+        """
+        ts = resp.pop("ts", None)
+        if ts is None:
+            # Error responses etc. - no timestamp, serialize directly
+            return orjson.dumps(resp, option=orjson.OPT_SERIALIZE_NUMPY)
+
+        key = (resp.get("command"), resp.get("address"),
+               resp["value"] if "value" in resp else resp.get("success"))
+        prefix = self._resp_cache.get(key)
+        if prefix is None:
+            if len(self._resp_cache) >= 1024:
+                self._resp_cache.clear()  # crude but sufficient bound
+            # OPT_SERIALIZE_NUMPY handles np scalars without .tolist()
+            prefix = (orjson.dumps(resp, option=orjson.OPT_SERIALIZE_NUMPY)[:-1]
+                      + b',"ts":')
+            self._resp_cache[key] = prefix
+        return prefix + repr(ts).encode() + b'}'
+
     def _process_message(self, message):
         try:
-            data = json.loads(message)
+            data = orjson.loads(message)  # accepts bytes or str
+        except orjson.JSONDecodeError:
+            return {"error": "Invalid JSON"}
+        return self._process_command(data)
+
+    def _process_command(self, data):
+        try:
             cmd = data.get("command")
             p = data.get("params", {})
 
@@ -108,50 +248,45 @@ class WebSocketServer:
             else:
                 return {"error": "Unknown command"}
 
-        except json.JSONDecodeError:
-            return {"error": "Invalid JSON"}
         except Exception as e:
             return {"error": str(e)}
 
     def _simulate_read(self, address, size):
         """Simulate reading a parameter value"""
-        param = next((p for p in PARAMETER_DEFS if p["address"] == address), None)
+        if self._addr_to_param is None:
+            self._build_addr_maps()
+        param = self._addr_to_param.get(address)
         if param:
             if param["type"] == "float":
-                return round(np.random.uniform(param["min"], param["max"]), 3)
+                return round(_R.uniform(param["min"], param["max"]), 3)
             else:
-                return np.random.randint(param["min"], param["max"])
+                # exclusive upper bound, matching the old np.random.randint
+                return _R.randint(param["min"], param["max"] - 1)
         return 0
 
     def _address_to_param_name(self, address):
         """Convert address to parameter name"""
-        for param in PARAMETER_DEFS:
-            if param["address"] == address:
-                return param["name"]
-        return None
+        if self._addr_to_name is None:
+            self._build_addr_maps()
+        return self._addr_to_name.get(address)
 
     def _notify_value_update(self, values):
         """Notify all registered callbacks of new values"""
-        for callback in self.value_callbacks:
+        callbacks = self.value_callbacks  # snapshot to a local once
+        for callback in callbacks:
             callback(values)
 
     def _notify_connection_change(self, connected):
         """Notify all registered callbacks of connection changes"""
-        for callback in self.connection_callbacks:
+        callbacks = self.connection_callbacks
+        for callback in callbacks:
             callback(connected)
 
     def stop(self):
-        """Shut down the server and all connections"""
+        """Shut down the server and all connections (thread-safe)"""
         self.running = False
-        for c in self.clients:
-            try:
-                c.close()
-            except:
-                pass
-        try:
-            self.server_socket.close()
-        except:
-            pass
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
         print("🛑 Server stopped")
 
 # In websocket_server_test.py
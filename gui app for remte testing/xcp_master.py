@@ -7,10 +7,13 @@ It provides functions to connect, read, and write parameters using the XCP proto
 """
 
 import socket
+import selectors
 import struct
 import time
 import threading
 import logging
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from enum import Enum
 
 # Configure logging
@@ -102,7 +105,22 @@ class XcpError(Enum):
     GENERIC = 0x31
     VERIFY = 0x32
     RESOURCE_TEMP_NOT_ACCESSIBLE = 0x33
-    
+
+# Error code -> name lookup built once; the old inline version rebuilt a
+# list of every enum value and scanned it per error response
+_ERR_NAMES = {e.value: e.name for e in XcpError}
+
+# Linux-only socket flags/options, zero elsewhere so the calls are no-ops
+_MSG_MORE = getattr(socket, 'MSG_MORE', 0)
+_TCP_QUICKACK = getattr(socket, 'TCP_QUICKACK', 0)
+
+# Pre-compiled packers - struct.pack("<I", ...) re-parses the format string
+# on every call, these are bound once and hit the C fast path
+_U32 = struct.Struct("<I")
+_U16 = struct.Struct("<H")
+_F32 = struct.Struct("<f")
+
+
 class XcpMaster:
     def __init__(self, host='localhost', port=5555):
         """
@@ -120,8 +138,21 @@ class XcpMaster:
         self.max_retries = 3
         self.lock = threading.Lock()
         self.callback = None
-        self.dto_queue = []
+        # deque append/popleft are atomic under the GIL, so the receiver
+        # thread and the poller need no lock; maxlen bounds memory if the
+        # GUI stops draining
+        self.dto_queue = deque(maxlen=4096)
         self.float_params = set()
+        # Reusable receive buffer - recv() allocates a fresh bytes object
+        # per packet, recv_into fills this in place. Only the reader
+        # thread touches it.
+        self._rx = bytearray(65536)
+        self._rxmv = memoryview(self._rx)
+        # (future, expected response length) pairs awaiting responses;
+        # XCP-on-TCP replies arrive in submission order, so the reader
+        # resolves them FIFO
+        self._pending = deque()
+        self._reader_thread = None
         
     def connect_to_slave(self):
         """
@@ -133,12 +164,16 @@ class XcpMaster:
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.settimeout(self.timeout)
+            # CTO packets are tiny; without this Nagle holds them back
+            # waiting for ACKs of previous sends
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.sock.connect((self.host, self.port))
             self.connected = True
-            logger.info(f"Connected to XCP slave at {self.host}:{self.port}")
+            self._start_reader()
+            logger.info("Connected to XCP slave at %s:%s", self.host, self.port)
             return True
         except Exception as e:
-            logger.error(f"Failed to connect to XCP slave: {e}")
+            logger.error("Failed to connect to XCP slave: %s", e)
             return False
             
     def disconnect_from_slave(self):
@@ -146,71 +181,139 @@ class XcpMaster:
         Disconnect from XCP slave
         """
         if self.sock:
+            self.connected = False  # stops the reader loop
             self.sock.close()
             self.sock = None
-            self.connected = False
+            # Wait for the reader to exit so a quick reconnect cannot
+            # find the stale thread still alive and skip starting a new
+            # one for the new socket
+            reader = self._reader_thread
+            if reader is not None and reader is not threading.current_thread():
+                reader.join(timeout=1.0)
+            self._reader_thread = None
+            self._fail_pending()
             logger.info("Disconnected from XCP slave")
             
-    def send_command(self, command, data=None):
+    @staticmethod
+    def _build_packet(command, data):
         """
-        Send XCP command to slave
-        
-        Args:
-            command: XCP command code
-            data: Command data (optional)
-            
-        Returns:
-            tuple: (success, response)
+        Build a command packet; prebuilt bytes/bytearray pass straight
+        through
         """
-        if not self.sock:
-            logger.error("Not connected to XCP slave")
-            return False, None
-            
-        # Build command packet
+        if isinstance(command, (bytes, bytearray)):
+            return command
+
         if isinstance(command, XcpCmd):
             command = command.value
-            
+
         packet = bytearray([command])
         if data:
             if isinstance(data, (list, tuple)):
                 packet.extend(data)
             else:
                 packet.append(data)
-                
-        # Send packet
+        return packet
+
+    def submit(self, command, data=None, more=False, resp_len=None):
+        """
+        Send XCP command and return a Future for its response
+
+        The lock covers only the send + enqueue, so several commands can
+        be in flight at once; the reader thread resolves the futures in
+        submission order.
+
+        Args:
+            command: XCP command code or prebuilt packet
+            data: Command data (optional)
+            more: Further packets follow immediately - set MSG_MORE so
+                the kernel coalesces instead of sending a tinygram
+            resp_len: Expected length of the positive response frame
+                including the PID byte. Pipelined responses can arrive
+                concatenated in one TCP segment; the length lets the
+                reader split them into frames. None means the response
+                fills whatever the recv returned (safe only when no other
+                command is in flight behind this one).
+
+        Returns:
+            Future resolving to a (success, response) tuple
+        """
+        fut = Future()
+        if not self.sock:
+            logger.error("Not connected to XCP slave")
+            fut.set_result((False, None))
+            return fut
+
+        packet = self._build_packet(command, data)
+        entry = (fut, resp_len)
         with self.lock:
+            self._pending.append(entry)
             try:
-                self.sock.send(packet)
-                
-                # Receive response
-                response = self.sock.recv(1024)
-                
-                if not response:
-                    logger.error("No response received from slave")
-                    return False, None
-                    
-                # Check response PID
-                pid = response[0]
-                if pid == XcpPid.RES.value:
-                    # Positive response
-                    return True, response[1:]
-                elif pid == XcpPid.ERR.value:
-                    # Error response
-                    error_code = response[1]
-                    logger.error(f"XCP Error: {XcpError(error_code).name if error_code in [e.value for e in XcpError] else hex(error_code)}")
-                    return False, error_code
-                else:
-                    # Other response (event, service request)
-                    logger.warning(f"Unexpected response PID: {hex(pid)}")
-                    return False, response
-                    
-            except socket.timeout:
-                logger.error("Timeout waiting for slave response")
-                return False, None
+                self.sock.sendall(packet, _MSG_MORE if more else 0)
             except Exception as e:
-                logger.error(f"Error communicating with slave: {e}")
-                return False, None
-                
+                logger.error("Error sending to slave: %s", e)
+                self._pending.remove(entry)
+                fut.set_result((False, None))
+        return fut
+
+    def _wait(self, fut):
+        """
+        Block on a submitted Future with the configured timeout
+        """
+        try:
+            return fut.result(self.timeout)
+        except FutureTimeoutError:
+            logger.error("Timeout waiting for slave response")
+            return False, None
+
+    def send_command(self, command, data=None):
+        """
+        Send XCP command to slave and wait for the response
+
+        Args:
+            command: XCP command code
+            data: Command data (optional)
+
+        Returns:
+            tuple: (success, response)
+        """
+        return self._wait(self.submit(command, data))
+
+    def send_commands_batch(self, commands):
+        """
+        Pipeline several XCP commands without waiting in between
+
+        All packets are submitted back to back and the in-order responses
+        are collected afterwards, so a read of N parameters pays roughly
+        one network round trip instead of N.
+
+        Response lengths are unknown for arbitrary commands, so coalesced
+        replies cannot be split reliably here; callers that know each
+        response size should submit() directly with resp_len, as
+        read_parameters_bulk does.
+
+        Args:
+            commands: List of (command, data) tuples as accepted by
+                send_command
+
+        Returns:
+            list: One (success, response) tuple per command, in order
+        """
+        # MSG_MORE on all but the last packet lets the kernel merge the
+        # batch into full segments; the final plain send flushes it
+        last = len(commands) - 1
+        futures = [self.submit(command, data, more=(i < last))
+                   for i, (command, data) in enumerate(commands)]
+        return [self._wait(fut) for fut in futures]
+
+    def _fail_pending(self):
+        """
+        Resolve every in-flight Future as failed (connection gone)
+        """
+        while self._pending:
+            fut, _ = self._pending.popleft()
+            if not fut.done():
+                fut.set_result((False, None))
+
     def xcp_connect(self, mode=0):
         """
         Establish XCP connection with slave
@@ -233,8 +336,11 @@ class XcpMaster:
             protocol_version = response[5]
             transport_version = response[6]
             
-            logger.info(f"XCP Connected - Resource: {hex(resource)}, Max CTO: {max_cto}, Max DTO: {max_dto}")
-            logger.debug(f"Protocol version: {protocol_version}, Transport version: {transport_version}")
+            logger.info("XCP Connected - Resource: %s, Max CTO: %s, Max DTO: %s",
+                        hex(resource), max_cto, max_dto)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Protocol version: %s, Transport version: %s",
+                             protocol_version, transport_version)
             
             return True
         return False
@@ -281,10 +387,13 @@ class XcpMaster:
         Returns:
             bool: True if successful, False otherwise
         """
-        data = [0, 0, address_ext]
-        data.extend(struct.pack("<I", address))
-        
-        success, _ = self.send_command(XcpCmd.SET_MTA, data)
+        # Presized packet packed in place - no incremental extends
+        pkt = bytearray(8)
+        pkt[0] = XcpCmd.SET_MTA.value
+        pkt[3] = address_ext
+        _U32.pack_into(pkt, 4, address)
+
+        success, _ = self.send_command(pkt)
         return success
         
     def xcp_upload(self, size):
@@ -316,15 +425,15 @@ class XcpMaster:
             if isinstance(data, (int, float)):
                 # Convert single value to bytes
                 if isinstance(data, int):
-                    data = struct.pack("<I", data)
+                    data = _U32.pack(data)
                 else:  # float
-                    data = struct.pack("<f", data)
+                    data = _F32.pack(data)
             else:
                 data = bytes(data)
-                
+
         packet = [len(data)]
         packet.extend(data)
-        
+
         success, _ = self.send_command(XcpCmd.DOWNLOAD, packet)
         return success
         
@@ -340,10 +449,13 @@ class XcpMaster:
         Returns:
             tuple: (success, data)
         """
-        data = [size, 0, address_ext]
-        data.extend(struct.pack("<I", address))
-        
-        success, response = self.send_command(XcpCmd.SHORT_UPLOAD, data)
+        pkt = bytearray(8)
+        pkt[0] = XcpCmd.SHORT_UPLOAD.value
+        pkt[1] = size
+        pkt[3] = address_ext
+        _U32.pack_into(pkt, 4, address)
+
+        success, response = self.send_command(pkt)
         if success:
             return True, response
         return False, None
@@ -364,17 +476,21 @@ class XcpMaster:
             if isinstance(data, (int, float)):
                 # Convert single value to bytes
                 if isinstance(data, int):
-                    data = struct.pack("<I", data)
+                    data = _U32.pack(data)
                 else:  # float
-                    data = struct.pack("<f", data)
+                    data = _F32.pack(data)
             else:
                 data = bytes(data)
-                
-        packet = [len(data), 0, address_ext]
-        packet.extend(struct.pack("<I", address))
-        packet.extend(data)
-        
-        success, _ = self.send_command(XcpCmd.SHORT_DOWNLOAD, packet)
+
+        # Total length is known up front: 8 header bytes plus the payload
+        pkt = bytearray(8 + len(data))
+        pkt[0] = XcpCmd.SHORT_DOWNLOAD.value
+        pkt[1] = len(data)
+        pkt[3] = address_ext
+        _U32.pack_into(pkt, 4, address)
+        pkt[8:] = data
+
+        success, _ = self.send_command(pkt)
         return success
         
     def read_parameter(self, address, size):
@@ -391,20 +507,59 @@ class XcpMaster:
         success, data = self.xcp_short_upload(address, 0, size)
         if not success or not data:
             return None
-            
-        # Convert bytes to appropriate type based on size
+
+        return self._decode_value(address, size, data)
+
+    def _decode_value(self, address, size, data):
+        """
+        Convert uploaded bytes to the appropriate type based on size
+        """
         if size == 1:
             return data[0]
         elif size == 2:
-            return struct.unpack("<H", data[:2])[0]
+            return _U16.unpack_from(data)[0]
         elif size == 4:
             if address in self.float_params:
-                return struct.unpack("<f", data[:4])[0]
+                return _F32.unpack_from(data)[0]
             else:
-                return struct.unpack("<I", data[:4])[0]
+                return _U32.unpack_from(data)[0]
         else:
             return data
-            
+
+    def read_parameters_bulk(self, addr_size_list):
+        """
+        Read several parameters with one pipelined batch of SHORT_UPLOADs
+
+        Args:
+            addr_size_list: List of (address, size) tuples
+
+        Returns:
+            list: Decoded value per parameter, None where the read failed
+        """
+        # Submitted directly rather than via send_commands_batch so each
+        # command can declare its response length (PID + size payload
+        # bytes) - that is what lets the reader split the concatenated
+        # pipelined responses back into frames
+        futures = []
+        last = len(addr_size_list) - 1
+        for i, (address, size) in enumerate(addr_size_list):
+            pkt = bytearray(8)
+            pkt[0] = XcpCmd.SHORT_UPLOAD.value
+            pkt[1] = size
+            _U32.pack_into(pkt, 4, address)
+            futures.append(self.submit(pkt, more=(i < last), resp_len=1 + size))
+
+        results = [self._wait(fut) for fut in futures]
+
+        values = []
+        for (address, size), (success, data) in zip(addr_size_list, results):
+            if success and data:
+                values.append(self._decode_value(address, size, data))
+            else:
+                values.append(None)
+        return values
+
+
     def write_parameter(self, address, value, size):
         """
         Write parameter value to memory
@@ -421,12 +576,12 @@ class XcpMaster:
         if size == 1:
             data = bytes([value & 0xFF])
         elif size == 2:
-            data = struct.pack("<H", value)
+            data = _U16.pack(value)
         elif size == 4:
             if address in self.float_params:
-                data = struct.pack("<f", value)
+                data = _F32.pack(value)
             else:
-                data = struct.pack("<I", value)
+                data = _U32.pack(value)
         else:
             if not isinstance(value, (bytes, bytearray)):
                 return False
@@ -454,42 +609,115 @@ class XcpMaster:
         
     def start_dto_reception(self):
         """
-        Start thread to receive DTO packets
-        """
-        self.dto_thread = threading.Thread(target=self._dto_receiver)
-        self.dto_thread.daemon = True
-        self.dto_thread.start()
-        
-    def _dto_receiver(self):
+        Start reception of DTO packets
+
+        Kept for backward compatibility - the reader thread that handles
+        DTOs is started by connect_to_slave.
         """
-        Thread function to receive DTO packets
+        self._start_reader()
+
+    def _start_reader(self):
+        """
+        Start the reader thread if it is not already running
+        """
+        if self.sock is None:
+            return
+        if self._reader_thread is not None and self._reader_thread.is_alive():
+            return
+        self._reader_thread = threading.Thread(target=self._socket_reader,
+                                               args=(self.sock,))
+        self._reader_thread.daemon = True
+        self._reader_thread.start()
+
+    def _socket_reader(self, sock):
         """
-        while self.connected:
-            try:
-                if self.sock:
-                    # Set socket to non-blocking mode for this check
-                    self.sock.setblocking(0)
-                    
-                    try:
-                        data = self.sock.recv(1024)
-                        if data:
-                            # Process DTO packet
+        Single reader thread: resolves pending command futures and routes
+        DTO packets
+
+        Command responses (RES/ERR PIDs) complete the oldest pending
+        Future; everything else is a DTO and goes to the callback/queue.
+
+        Pipelined batches mean one recv can return several concatenated
+        response frames, so received bytes are accumulated and sliced
+        into frames using each pending command's expected response
+        length rather than assuming one recv per packet.
+        """
+        # epoll-backed wait instead of the old setblocking(0)/recv/
+        # setblocking(1)/sleep(0.01) poll: no exception per empty check,
+        # no 10 ms latency floor - the thread wakes as soon as data lands.
+        # The socket itself stays in blocking mode: select() gates the
+        # recv here, and submit()'s sendall must never partially write
+        # and raise mid-packet the way a non-blocking send can.
+        sel = selectors.DefaultSelector()
+        sel.register(sock, selectors.EVENT_READ)
+        buf = bytearray()  # carries partial frames between recvs
+        try:
+            # The thread is bound to the socket it was started for and
+            # exits when that socket is replaced, so a stale reader can
+            # never outlive a reconnect and starve the new connection
+            while self.connected and self.sock is sock:
+                try:
+                    if not sel.select(timeout=0.5):
+                        continue  # periodic wake to re-check the loop guard
+                    n = sock.recv_into(self._rxmv)
+                    if _TCP_QUICKACK:
+                        # Re-arm after every recv (the kernel resets it) so
+                        # our ACKs never sit out a delayed-ACK timer
+                        sock.setsockopt(socket.IPPROTO_TCP, _TCP_QUICKACK, 1)
+                    if not n:
+                        logger.error("Connection closed by slave")
+                        self.connected = False
+                        break
+
+                    buf += self._rxmv[:n]
+                    while buf:
+                        pid = buf[0]
+                        if pid in (XcpPid.RES.value, XcpPid.ERR.value) and self._pending:
+                            fut, resp_len = self._pending[0]
+                            if pid == XcpPid.ERR.value:
+                                frame_len = 2  # PID + error code
+                            elif resp_len is not None:
+                                frame_len = resp_len
+                            else:
+                                # Length unknown - the remainder is the frame
+                                frame_len = len(buf)
+                            if len(buf) < frame_len:
+                                break  # wait for the rest of the frame
+
+                            self._pending.popleft()
+                            if pid == XcpPid.RES.value:
+                                result = (True, bytes(buf[1:frame_len]))
+                            else:
+                                error_code = buf[1]
+                                # Lazy formatting: the name lookup and message
+                                # build only happen if the record is emitted
+                                logger.error("XCP Error: %s",
+                                             _ERR_NAMES.get(error_code) or hex(error_code))
+                                result = (False, error_code)
+                            if not fut.done():
+                                fut.set_result(result)
+                            del buf[:frame_len]
+                        else:
+                            # DTO packet - no length header, so the whole
+                            # remaining chunk is treated as one packet
+                            data = bytes(buf)
+                            buf.clear()
                             if self.callback:
                                 self.callback(data)
                             else:
                                 self.dto_queue.append(data)
-                    except socket.error:
-                        # No data available
-                        pass
-                        
-                    # Set socket back to blocking mode
-                    self.sock.setblocking(1)
-                    
-                time.sleep(0.01)  # Small delay to prevent CPU hogging
-                
-            except Exception as e:
-                logger.error(f"Error in DTO receiver: {e}")
-                time.sleep(0.1)  # Delay before retry
+                except socket.timeout:
+                    continue  # spurious readiness - nothing to read after all
+                except OSError:
+                    if self.connected:
+                        logger.error("Socket error in reader thread")
+                    break
+                except Exception as e:
+                    logger.error("Error in reader thread: %s", e)
+                    time.sleep(0.1)  # Delay before retry
+        finally:
+            sel.close()
+            self._fail_pending()
                 
     def get_dto_packets(self):
         """
@@ -498,6 +726,8 @@ class XcpMaster:
         Returns:
             list: List of received DTO packets
         """
-        packets = self.dto_queue.copy()
-        self.dto_queue.clear()
+        packets = []
+        dq = self.dto_queue
+        while dq:
+            packets.append(dq.popleft())
         return packets
\ No newline at end of file
@@ -4,6 +4,11 @@ import spidev
 import time
 from datetime import datetime
 import threading
+import logging
+
+log = logging.getLogger(__name__)
+
+DUMMY = [0xAA] * 8  # preallocated once, xfer2 never mutates its argument
 
 class XcpSpiHandler:
     def __init__(self, bus=0, device=0, speed_hz=500000):
@@ -26,25 +31,21 @@ class XcpSpiHandler:
     def send_xcp_command(self, command):
         if len(command) != 8:
             command = self._pad_command(command)
-            
-        print("\n" + "="*60)
-        print("SENDING TO XCP SLAVE")
-        print("="*60)
-        print(f"Command: {[hex(x) for x in command]}")
-        
+
+        # Guarded debug logging - at INFO the hot path formats nothing
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("SPI TX %s", bytes(command).hex(' '))
+
         # Send command
         self.spi.xfer2(command)
         time.sleep(0.01)
-        
+
         # Get response
-        dummy = [0xAA] * 8
-        response = self.spi.xfer2(dummy)
-        
-        print("\nRECEIVED FROM XCP SLAVE")
-        print("="*60)
-        print(f"Response: {[hex(x) for x in response]}")
-        print("="*60)
-        
+        response = self.spi.xfer2(DUMMY)
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("SPI RX %s", bytes(response).hex(' '))
+
         return response
         
     def _pad_command(self, command):
@@ -121,6 +122,8 @@ class XcpGatewayClient:
         self.ws_thread.start()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)  # set DEBUG to trace SPI frames
+
     # Replace with your ngrok WebSocket URL
     NGROK_WS_URL = "wss://divine-next-lionfish.ngrok-free.app"
     
@@ -44,7 +44,7 @@ class XcpMaster:
                 print("\nXCP SLAVE RESPONSE:")
                 print(f"Command: {data.get('command_name')}")
                 print(f"Status: {data.get('status')}")
-                print(f"Data: {[hex(x) for x in data.get('response_bytes', [])]}")
+                print(f"Data: {bytes(data.get('response_bytes', [])).hex(' ')}")
                 
         except Exception as e:
             print(f"Error processing message: {e}")